@@ -3,17 +3,27 @@
 from __future__ import annotations
 
 import argparse
+import functools
+import os
 import re
-import shlex
-import subprocess
+import shutil
+import sys
 import typing
 
 if typing.TYPE_CHECKING:
     from argparse import ArgumentParser, Namespace
-    from typing import Any, Dict, Mapping, Optional, Tuple, Type
+    from types import FrameType
+    from typing import Any, Callable, Dict, Mapping, Optional, Tuple, Type, TypeVar
 
     from .base import Section
 
+    T = TypeVar("T")
+
+_ZSH_VERSION_RE = re.compile(rb"[0-9]+\.[0-9]+")
+
+# value set by a Switch depending on the prefix of the option
+_SWITCH_VALUES = {"-": False, "+": True}
+
 
 class Switch(argparse.Action):
     """Inherited from argparse.Action, store True/False to a +/-arg.
@@ -34,7 +44,82 @@ class Switch(argparse.Action):
             raise ValueError(
                 "Switch action is not suitable for " "positional arguments."
             )
-        setattr(namespace, self.dest, bool("-+".index(option_string[0])))
+        setattr(namespace, self.dest, _SWITCH_VALUES[option_string[0]])
+
+
+class LazySubParsersAction(argparse._SubParsersAction):
+    """Inherited from argparse._SubParsersAction, populate subparsers lazily.
+
+    Subparsers registered with `add_lazy_parser` are created empty, and only
+    filled with their arguments when the corresponding subcommand is invoked.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._populators: Dict[str, Callable[[ArgumentParser], None]] = {}
+
+    def add_lazy_parser(
+        self, name: str, populate: Callable[[ArgumentParser], None], **kwargs: Any
+    ) -> ArgumentParser:
+        """Add a subparser, `populate` is called on it before its first use."""
+        parser = self.add_parser(name, **kwargs)
+        self._populators[name] = populate
+        return parser
+
+    def __call__(
+        self,
+        parser: ArgumentParser,
+        namespace: Namespace,
+        values: Any,
+        option_string: Optional[str] = None,
+    ) -> None:
+        """Populate the invoked subparser if needed before delegating to it."""
+        populate = self._populators.pop(values[0], None)
+        if populate is not None:
+            populate(self._name_parser_map[values[0]])
+        super().__call__(parser, namespace, values, option_string)
+
+
+def cached_per_class(func: Callable[[Type[Any]], T]) -> Callable[[Type[Any]], T]:
+    """Cache the result of a classmethod body on the class itself.
+
+    The result is stored in the `__dict__` of the class the method is called
+    on, so that subclasses compute their own value instead of inheriting the
+    one of their parent.
+    """
+    attr = f"_loam_cache_{func.__name__}"
+
+    @functools.wraps(func)
+    def wrapper(cls: Type[Any]) -> T:
+        try:
+            return cls.__dict__[attr]
+        except KeyError:
+            value = func(cls)
+            setattr(cls, attr, value)
+            return value
+
+    return wrapper
+
+
+def _is_internal_frame(frame: FrameType) -> bool:
+    module = frame.f_globals.get("__name__", "")
+    return module.startswith("loam.") or module == "argparse"
+
+
+def stacklevel_outside_loam() -> int:
+    """Stack level of the first caller outside of loam.
+
+    This is meant to be passed as `stacklevel` to `warnings.warn` by the
+    function calling this one, so that warnings point to user code regardless
+    of the path taken inside loam. Frames of argparse are skipped too, as it
+    calls back into loam when populating subparsers.
+    """
+    frame = sys._getframe(1)
+    level = 1
+    while frame.f_back is not None and _is_internal_frame(frame):
+        frame = frame.f_back
+        level += 1
+    return level
 
 
 class SectionContext:
@@ -48,27 +133,46 @@ class SectionContext:
             context.
     """
 
+    __slots__ = ("_section", "_options", "_old_values")
+
     def __init__(self, section: Section, options: Mapping[str, Any]):
         self._section = section
         self._options = options
         self._old_values: Dict[str, Any] = {}
 
     def __enter__(self) -> None:
-        self._old_values = {opt: getattr(self._section, opt) for opt in self._options}
+        section = self._section
+        self._old_values = {opt: getattr(section, opt) for opt in self._options}
         self._section.update_from_dict_(self._options)
 
     def __exit__(self, e_type: Optional[Type[BaseException]], *_: Any) -> bool:
-        self._section.update_from_dict_(self._old_values)
+        # old values already have the right type, no need to cast them
+        for opt, val in self._old_values.items():
+            setattr(self._section, opt, val)
         return e_type is None
 
 
+@functools.lru_cache(maxsize=1)
 def zsh_version() -> Tuple[int, ...]:
-    """Try to guess zsh version, return (0, 0) on failure."""
-    try:
-        out = subprocess.run(
-            shlex.split("zsh --version"), check=True, stdout=subprocess.PIPE
-        ).stdout
-    except (FileNotFoundError, subprocess.CalledProcessError):
+    """Try to guess zsh version, return (0, 0) on failure.
+
+    The version can be set with the `LOAM_ZSH_VERSION` environment variable
+    to avoid running zsh.
+    """
+    env_version = os.environ.get("LOAM_ZSH_VERSION")
+    if env_version is not None:
+        out = env_version.encode()
+    elif shutil.which("zsh") is None:
         return (0, 0)
-    v_match = re.search(rb"[0-9]+\.[0-9]+", out)
+    else:
+        import shlex
+        import subprocess
+
+        try:
+            out = subprocess.run(
+                shlex.split("zsh --version"), check=True, stdout=subprocess.PIPE
+            ).stdout
+        except (FileNotFoundError, subprocess.CalledProcessError):
+            return (0, 0)
+    v_match = _ZSH_VERSION_RE.search(out)
     return tuple(map(int, v_match.group(0).split(b"."))) if v_match else (0, 0)
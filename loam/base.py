@@ -2,9 +2,14 @@
 
 from __future__ import annotations
 
+import copy
+import functools
+import operator
+import sys
 from dataclasses import Field, dataclass, field, fields
 from os import PathLike
 from pathlib import Path
+from types import MappingProxyType
 from typing import (
     Any,
     Callable,
@@ -13,14 +18,13 @@ from typing import (
     Generic,
     Mapping,
     Optional,
+    Tuple,
     Type,
     TypeVar,
     Union,
     get_type_hints,
 )
 
-import toml
-
 from . import _internal
 
 T = TypeVar("T")
@@ -72,12 +76,8 @@ class Entry(Generic[T]):
 
     def field(self) -> T:
         """Produce a `dataclasses.Field` from the entry."""
-        non_none_cout = (
-            int(self.val is not None)
-            + int(self.val_toml is not None)
-            + int(self.val_factory is not None)
-        )
-        if non_none_cout != 1:
+        defaults = (self.val, self.val_toml, self.val_factory)
+        if sum(dflt is not None for dflt in defaults) != 1:
             raise ValueError(
                 "Exactly one of val, val_toml, and val_factory should be set."
             )
@@ -144,6 +144,48 @@ class Meta(Generic[T]):
     type_hint: Type[T]
 
 
+if sys.version_info >= (3, 10):
+    from inspect import get_annotations as _own_annotations
+else:
+
+    def _own_annotations(cls: type) -> Mapping[str, Any]:
+        return cls.__dict__.get("__annotations__", {})
+
+
+def _type_hints(cls: type) -> Dict[str, Any]:
+    """Type hints of a dataclass.
+
+    This avoids the cost of `typing.get_type_hints` when all the annotations
+    are already classes, which is the case if they are not postponed.
+    """
+    annotations: Dict[str, Any] = {}
+    for base in reversed(cls.__mro__):
+        annotations.update(_own_annotations(base))
+    if all(fld.name in annotations for fld in fields(cls)) and all(
+        isinstance(thint, type) for thint in annotations.values()
+    ):
+        return annotations
+    return get_type_hints(cls)
+
+
+def _type_hint_caster(field_name: str, type_hint: Type[T]) -> Callable[[object], T]:
+    """Build a function casting values to a type hint when needed."""
+
+    def cast(value_to_cast: object) -> T:
+        if type(value_to_cast) is type_hint or isinstance(value_to_cast, type_hint):
+            return value_to_cast
+        try:
+            # TYPE SAFETY: a failed cast is reported as a TypeError below
+            return type_hint(value_to_cast)  # type: ignore
+        except Exception:
+            raise TypeError(
+                f"Couldn't cast {value_to_cast!r} to a {type_hint}, "
+                f"you might need to specify `from_toml` for {field_name}."
+            )
+
+    return cast
+
+
 @dataclass
 class Section:
     """Base class for a configuration section.
@@ -153,25 +195,92 @@ class Section:
     """
 
     @classmethod
+    @_internal.cached_per_class
     def _type_hints(cls) -> Dict[str, Any]:
-        return get_type_hints(cls)
+        return _type_hints(cls)
 
-    def __post_init__(self) -> None:
-        self._loam_meta: Dict[str, Meta] = {}
-        thints = self._type_hints()
-        for fld in fields(self):
-            meta = fld.metadata.get("loam_entry", Entry())
+    @classmethod
+    @_internal.cached_per_class
+    def _fields(cls) -> Tuple[Field, ...]:
+        return fields(cls)
+
+    @classmethod
+    @_internal.cached_per_class
+    def _entries(cls) -> Mapping[str, Entry]:
+        return MappingProxyType(
+            {fld.name: fld.metadata.get("loam_entry", Entry()) for fld in cls._fields()}
+        )
+
+    @classmethod
+    @_internal.cached_per_class
+    def _field_types(cls) -> Mapping[str, type]:
+        field_types = {}
+        thints = cls._type_hints()
+        for fld in cls._fields():
             thint = thints[fld.name]
-            if not isinstance(thint, type):
-                thint = object
-            self._loam_meta[fld.name] = Meta(fld, meta, thint)
-            current_val = getattr(self, fld.name)
-            if not isinstance(current_val, thint):
-                self.cast_and_set_(fld.name, current_val)
+            field_types[fld.name] = thint if isinstance(thint, type) else object
+        return MappingProxyType(field_types)
+
+    @classmethod
+    @_internal.cached_per_class
+    def _meta_template(cls) -> Mapping[str, Meta]:
+        entries = cls._entries()
+        field_types = cls._field_types()
+        return MappingProxyType(
+            {
+                fld.name: Meta(fld, entries[fld.name], field_types[fld.name])
+                for fld in cls._fields()
+            }
+        )
+
+    @classmethod
+    @_internal.cached_per_class
+    def _casters(cls) -> Mapping[str, Callable[[object], Any]]:
+        casters = {}
+        field_types = cls._field_types()
+        for name, entry in cls._entries().items():
+            if entry.from_toml is not None:
+                casters[name] = entry.from_toml
+            else:
+                casters[name] = _type_hint_caster(name, field_types[name])
+        return MappingProxyType(casters)
+
+    @classmethod
+    @_internal.cached_per_class
+    def _in_file(cls) -> Tuple[str, ...]:
+        return tuple(name for name, entry in cls._entries().items() if entry.in_file)
+
+    @classmethod
+    @_internal.cached_per_class
+    def _in_file_getter(cls) -> Callable[[Section], Tuple[Any, ...]]:
+        names = cls._in_file()
+        if len(names) > 1:
+            return operator.attrgetter(*names)
+        if names:
+            getter = operator.attrgetter(names[0])
+            return lambda section: (getter(section),)
+        return lambda _: ()
+
+    @classmethod
+    @_internal.cached_per_class
+    def _to_toml(cls) -> Mapping[str, Callable[[Any], object]]:
+        return MappingProxyType(
+            {
+                name: entry.to_toml
+                for name, entry in cls._entries().items()
+                if entry.to_toml is not None
+            }
+        )
+
+    def __post_init__(self) -> None:
+        for name, thint in self._field_types().items():
+            current_val = getattr(self, name)
+            if type(current_val) is not thint and not isinstance(current_val, thint):
+                self.cast_and_set_(name, current_val)
 
     def meta_(self, entry_name: str) -> Meta:
         """Metadata for the given entry name."""
-        return self._loam_meta[entry_name]
+        return self._meta_template()[entry_name]
 
     def cast_and_set_(self, field_name: str, value_to_cast: object) -> None:
         """Set an option from the string representation of the value.
@@ -183,19 +292,7 @@ class Section:
         value whose type cannot be controlled. Wherever possible, directly set
         the option value with the correct type instead of calling this method.
         """
-        meta = self._loam_meta[field_name]
-        if meta.entry.from_toml is not None:
-            value = meta.entry.from_toml(value_to_cast)
-        elif not isinstance(value_to_cast, meta.type_hint):
-            try:
-                value = meta.type_hint(value_to_cast)
-            except Exception:
-                raise TypeError(
-                    f"Couldn't cast {value_to_cast!r} to a {meta.type_hint}, "
-                    f"you might need to specify `from_toml` for {field_name}."
-                )
-        else:
-            value = value_to_cast
+        value = self._casters()[field_name](value_to_cast)
         setattr(self, field_name, value)
 
     def context_(self, **options: Any) -> ContextManager[None]:
@@ -207,49 +304,82 @@ class Section:
 
     def update_from_dict_(self, options: Mapping[str, object]) -> None:
         """Update options from a mapping, casting values as needed."""
+        casters = self._casters()
         for opt, val in options.items():
-            self.cast_and_set_(opt, val)
+            setattr(self, opt, casters[opt](val))
 
 
 TConfig = TypeVar("TConfig", bound="ConfigBase")
 
 
+@functools.lru_cache(maxsize=16)
+def _load_toml(path: Path, stamp: Tuple[int, int, int, int]) -> Dict[str, Any]:
+    """Parse a TOML file.
+
+    `path` should be resolved. `stamp` (inode, modification and change times,
+    and size of the file) is only used as a cache key, so that a file is
+    parsed again if it was modified or replaced. The returned dictionary is
+    shared between calls, its content should be copied before being handed to
+    sections.
+    """
+    if sys.version_info >= (3, 11):
+        import tomllib
+    else:
+        import tomli as tomllib
+
+    return tomllib.loads(path.read_text(encoding="utf-8"))
+
+
 @dataclass
 class ConfigBase:
     """Base class for a full configuration."""
 
     @classmethod
+    @_internal.cached_per_class
     def _type_hints(cls) -> Dict[str, Any]:
-        return get_type_hints(cls)
+        return _type_hints(cls)
 
     @classmethod
-    def default_(cls: Type[TConfig]) -> TConfig:
-        """Create a configuration with default values."""
+    @_internal.cached_per_class
+    def _fields(cls) -> Tuple[Field, ...]:
+        return fields(cls)
+
+    @classmethod
+    @_internal.cached_per_class
+    def _section_types(cls) -> Tuple[Tuple[str, Type[Section]], ...]:
         thints = cls._type_hints()
-        sections = {}
-        for fld in fields(cls):
+        section_types = []
+        for fld in cls._fields():
             thint = thints[fld.name]
             if not (isinstance(thint, type) and issubclass(thint, Section)):
                 raise TypeError(
                     f"Could not resolve type hint of {fld.name} to a Section "
                     f"(got {thint})"
                 )
-            sections[fld.name] = thint()
-        return cls(**sections)
+            section_types.append((fld.name, thint))
+        return tuple(section_types)
+
+    @classmethod
+    def default_(cls: Type[TConfig]) -> TConfig:
+        """Create a configuration with default values."""
+        return cls(**{name: sec_type() for name, sec_type in cls._section_types()})
 
     def update_from_file_(self, path: Union[str, PathLike]) -> None:
         """Update configuration from toml file."""
-        pars = toml.load(Path(path))
-        # only keep entries for which in_file is True
-        pars = {
-            sec_name: {
-                opt: val
-                for opt, val in section.items()
-                if getattr(self, sec_name).meta_(opt).entry.in_file
-            }
-            for sec_name, section in pars.items()
-        }
-        self.update_from_dict_(pars)
+        path = Path(path).resolve()
+        stat = path.stat()
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_ctime_ns, stat.st_size)
+        pars = _load_toml(path, stamp)
+        for sec_name, options in pars.items():
+            section: Section = getattr(self, sec_name)
+            entries = section._entries()
+            # only consider entries for which in_file is True
+            if len(section._in_file()) != len(entries):
+                options = {
+                    opt: val for opt, val in options.items() if entries[opt].in_file
+                }
+            # parsed values are cached, avoid sharing mutable ones with sections
+            section.update_from_dict_(copy.deepcopy(options))
 
     def update_from_dict_(self, options: Mapping[str, Mapping[str, Any]]) -> None:
         """Update configuration from a dictionary."""
@@ -258,25 +388,32 @@ class ConfigBase:
             section.update_from_dict_(opts)
 
     def to_file_(self, path: Union[str, PathLike], exist_ok: bool = True) -> None:
-        """Write configuration in toml file."""
+        """Write configuration in toml file.
+
+        The file is left untouched if it already has the desired content.
+        """
+        import toml
+
         path = Path(path)
         if not exist_ok and path.is_file():
             raise RuntimeError(f"{path} already exists")
-        path.parent.mkdir(parents=True, exist_ok=True)
-        sections = fields(self)
         to_dump: Dict[str, Dict[str, Any]] = {}
-        for sec in sections:
-            to_dump[sec.name] = {}
+        for sec in self._fields():
             section: Section = getattr(self, sec.name)
-            for fld in fields(section):
-                entry = section.meta_(fld.name).entry
-                if not entry.in_file:
-                    continue
-                value = getattr(section, fld.name)
-                if entry.to_toml is not None:
-                    value = entry.to_toml(value)
-                to_dump[sec.name][fld.name] = value
-            if not to_dump[sec.name]:
-                del to_dump[sec.name]
-        with path.open("w") as pf:
-            toml.dump(to_dump, pf)
+            in_file = section._in_file()
+            if not in_file:
+                continue
+            to_toml = section._to_toml()
+            sec_dump = to_dump[sec.name] = {}
+            for name, value in zip(in_file, section._in_file_getter()(section)):
+                if name in to_toml:
+                    value = to_toml[name](value)
+                sec_dump[name] = value
+        content = toml.dumps(to_dump)
+        try:
+            if path.read_text(encoding="utf-8") == content:
+                return
+        except (OSError, UnicodeDecodeError):
+            pass
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
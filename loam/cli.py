@@ -3,11 +3,11 @@
 from __future__ import annotations
 
 import argparse
-import copy
+import functools
 import pathlib
+import sys
 import typing
 import warnings
-from dataclasses import fields
 from types import MappingProxyType
 
 from . import _internal, error
@@ -15,31 +15,58 @@ from . import _internal, error
 if typing.TYPE_CHECKING:
     from argparse import ArgumentParser, Namespace
     from os import PathLike
-    from typing import Any, Dict, List, Mapping, Optional, TextIO, Union
+    from typing import Any, Dict, List, Mapping, Optional, Tuple, Type, Union
 
-    from .base import ConfigBase, Section
+    from .base import ConfigBase, Entry, Section
+
+    _FastFlags = Dict[str, Tuple[str, object]]
 
 
 BLK = " \\\n"  # cutting line in scripts
 
+# marker of options taking the next argument as value, see _fast_parse_args
+_NEEDS_VALUE = object()
+# cli_kwargs keys and actions supported by _fast_parse_args
+_FAST_CLI_KWARGS = frozenset(("action", "default", "metavar"))
+_FAST_ACTIONS = {"store": _NEEDS_VALUE, "store_true": True, "store_false": False}
+
+
+def _names(section: Section, option: str) -> Tuple[str, ...]:
+    """Tuple of cli strings for a given option."""
+    return _names_of_section(type(section))[option]
+
+
+@_internal.cached_per_class
+def _names_of_section(section_type: Type[Section]) -> Mapping[str, Tuple[str, ...]]:
+    """Cli strings of all options of a section type."""
+    return MappingProxyType(
+        {
+            option: _build_names(entry, option)
+            for option, entry in section_type._entries().items()
+        }
+    )
+
+
+@_internal.cached_per_class
+def _cli_options_of_section(section_type: Type[Section]) -> Tuple[str, ...]:
+    """Options of a section type that are exposed in the CLI."""
+    return tuple(
+        option for option, entry in section_type._entries().items() if entry.in_cli
+    )
 
-def _names(section: Section, option: str) -> List[str]:
-    """List of cli strings for a given option."""
-    entry = section.meta_(option).entry
+
+def _build_names(entry: Entry, option: str) -> Tuple[str, ...]:
+    """Build the tuple of cli strings for an option."""
     option = option.replace("_", "-")
     action = entry.cli_kwargs.get("action")
+    short = entry.cli_short
     if action is _internal.Switch:
-        names = [f"-{option}", f"+{option}"]
-        short = entry.cli_short
-        if short is not None:
-            names.append(f"-{short}")
-            names.append(f"+{short}")
-    else:
-        names = [f"--{option}"]
-        short = entry.cli_short
         if short is not None:
-            names.append(f"-{short}")
-    return names
+            return (f"-{option}", f"+{option}", f"-{short}", f"+{short}")
+        return (f"-{option}", f"+{option}")
+    if short is not None:
+        return (f"--{option}", f"-{short}")
+    return (f"--{option}",)
 
 
 class Subcmd:
@@ -71,6 +98,10 @@ class CLIManager:
         subcmds: all the subcommands of your CLI tool. The name of each
             *subcommand* is the name of the keyword argument passed on to
             this function.
+
+    Options of a command are solved when that command is first used (parsed
+    or completed), a warning is emitted at that point if an option of a
+    section shadows one of another section of the same command.
     """
 
     def __init__(
@@ -87,18 +118,35 @@ class CLIManager:
                 self._subcmds[sub_name] = sub_meta
             else:
                 raise error.SubcmdError(sub_name)
+        self._subcmds_view = MappingProxyType(self._subcmds)
         self._common = common_ if common_ is not None else Subcmd("")
         self._bare = bare_
-        # dict of dict [command][option] = section
+        for subcmd in (self._common, self._bare, *self._subcmds.values()):
+            if subcmd is not None:
+                for sct in subcmd.sections:
+                    # options are solved lazily, check sections exist right away
+                    getattr(config_, sct)
+        # [command] = sections, filled on demand
+        self._sections_cache: Dict[Optional[str], Tuple[str, ...]] = {}
+        # dict of dict [command][option] = section, filled on demand
         self._opt_cmds: Dict[str, Dict[str, str]] = {}
         # same as above but for bare command only [option] = section
         self._opt_bare: Dict[str, str] = {}
         if self.bare is not None:
             self._cmd_opts_solver(None)
-        for cmd_name in self.subcmds:
-            self._opt_cmds[cmd_name] = {}
-            self._cmd_opts_solver(cmd_name)
-        self._parser = self._build_parser()
+        # dict of dict [section][option] = value at construction time, this is
+        # used as default value of options by every command
+        self._cli_values: Dict[str, Dict[str, Any]] = {}
+        for fld in config_._fields():
+            section: Section = getattr(config_, fld.name)
+            self._cli_values[fld.name] = {
+                opt: getattr(section, opt)
+                for opt in _cli_options_of_section(type(section))
+            }
+        # dict of dict [command][option] = default, filled on demand
+        self._cmd_defaults: Dict[Optional[str], Dict[str, Any]] = {}
+        # [command][option string] = (option, value), see _fast_parse_args
+        self._fast_flags: Dict[Optional[str], Optional[_FastFlags]] = {}
 
     @property
     def common(self) -> Subcmd:
@@ -113,7 +161,7 @@ class CLIManager:
     @property
     def subcmds(self) -> Mapping[str, Subcmd]:
         """Subcommands description."""
-        return MappingProxyType(self._subcmds)
+        return self._subcmds_view
 
     def sections_list(self, cmd: Optional[str] = None) -> List[str]:
         """List of config sections used by a command.
@@ -124,44 +172,86 @@ class CLIManager:
         Returns:
             list of configuration sections used by that command.
         """
-        sections = list(self.common.sections)
-        if not cmd:
-            if self.bare is not None:
-                sections.extend(self.bare.sections)
-                return sections
-            return []
-        sections.extend(self.subcmds[cmd].sections)
-        if hasattr(self._conf, cmd):
-            sections.append(cmd)
-        return sections
+        return list(self._sections_for(cmd))
+
+    def _sections_for(self, cmd: Optional[str]) -> Tuple[str, ...]:
+        """Config sections used by a command, see `sections_list`."""
+        cmd = cmd or None
+        if cmd not in self._sections_cache:
+            sections = list(self.common.sections)
+            if cmd is None:
+                if self.bare is not None:
+                    sections.extend(self.bare.sections)
+                else:
+                    sections = []
+            else:
+                sections.extend(self.subcmds[cmd].sections)
+                if hasattr(self._conf, cmd):
+                    sections.append(cmd)
+            self._sections_cache[cmd] = tuple(sections)
+        return self._sections_cache[cmd]
+
+    def _opts_for(self, cmd_name: Optional[str]) -> Dict[str, str]:
+        """Mapping from option to section for a given command.
+
+        Args:
+            cmd_name: command name, set to None or '' for bare command.
+        """
+        if not cmd_name:
+            return self._opt_bare
+        if cmd_name not in self._opt_cmds:
+            self._opt_cmds[cmd_name] = {}
+            self._cmd_opts_solver(cmd_name)
+        return self._opt_cmds[cmd_name]
 
     def _cmd_opts_solver(self, cmd_name: Optional[str]) -> None:
-        """Scan options related to one command and enrich _opt_cmds."""
-        sections = self.sections_list(cmd_name)
+        """Scan options related to one command and enrich _opt_cmds.
+
+        This is done when the command is first used, shadowed options are
+        reported at that point with a warning pointing to the calling code.
+        """
+        sections = self._sections_for(cmd_name)
         cmd_dict = self._opt_cmds[cmd_name] if cmd_name else self._opt_bare
         for sct in reversed(sections):
             section: Section = getattr(self._conf, sct)
-            for fld in fields(section):
-                opt = fld.name
-                if not section.meta_(opt).entry.in_cli:
-                    continue
-                if opt not in cmd_dict:
+            for opt in _cli_options_of_section(type(section)):
+                shadowing_sct = cmd_dict.get(opt)
+                if shadowing_sct is None:
                     cmd_dict[opt] = sct
                 else:
                     warnings.warn(
-                        "Command <{0}>: {1}.{2} shadowed by {3}.{2}".format(
-                            cmd_name, sct, opt, cmd_dict[opt]
-                        ),
+                        f"Command <{cmd_name}>: {sct}.{opt} shadowed by "
+                        f"{shadowing_sct}.{opt}",
                         error.LoamWarning,
-                        stacklevel=4,
+                        stacklevel=_internal.stacklevel_outside_loam(),
                     )
 
+    def _defaults_for(self, cmd_name: Optional[str]) -> Dict[str, Any]:
+        """Default values of options of a given command.
+
+        They are computed when the command is first used, from the values of
+        options when the `CLIManager` was created.
+
+        Args:
+            cmd_name: command name, set to None or '' for bare command.
+        """
+        cmd_name = cmd_name or None
+        if cmd_name not in self._cmd_defaults:
+            defaults = {}
+            for opt, sct in self._opts_for(cmd_name).items():
+                section: Section = getattr(self._conf, sct)
+                cli_kwargs = section.meta_(opt).entry.cli_kwargs
+                defaults[opt] = cli_kwargs.get("default", self._cli_values[sct][opt])
+            self._cmd_defaults[cmd_name] = defaults
+        return self._cmd_defaults[cmd_name]
+
     def _add_options_to_parser(
-        self, opts_dict: Mapping[str, str], parser: ArgumentParser
+        self, cmd_name: Optional[str], parser: ArgumentParser
     ) -> None:
-        """Add options to a parser."""
+        """Add options of a given command to a parser."""
         groups = {}
-        for opt, sct in opts_dict.items():
+        defaults = self._defaults_for(cmd_name)
+        for opt, sct in self._opts_for(cmd_name).items():
             section: Section = getattr(self._conf, sct)
             section_t = type(section)
             if section_t not in groups:
@@ -170,14 +260,18 @@ class CLIManager:
                 groups[section_t] = parser.add_argument_group(group_doc)
             group = groups[section_t]
             entry = section.meta_(opt).entry
-            kwargs = copy.deepcopy(entry.cli_kwargs)
+            kwargs = dict(entry.cli_kwargs)
             action = kwargs.get("action")
             if action is _internal.Switch:
                 kwargs.update(nargs=0)
-            kwargs.update(help=entry.doc)
-            kwargs.setdefault("default", getattr(section, opt))
+            kwargs.update(help=entry.doc, default=defaults[opt])
             group.add_argument(*_names(section, opt), **kwargs)
 
+    @functools.cached_property
+    def _parser(self) -> ArgumentParser:
+        """Command line argument parser, built on first use."""
+        return self._build_parser()
+
     def _build_parser(self) -> ArgumentParser:
         """Build command line argument parser.
 
@@ -188,21 +282,111 @@ class CLIManager:
             description=self.common.help, prefix_chars="-+"
         )
 
-        self._add_options_to_parser(self._opt_bare, main_parser)
+        self._add_options_to_parser(None, main_parser)
         main_parser.set_defaults(**self.common.defaults)
         if self.bare is not None:
             main_parser.set_defaults(**self.bare.defaults)
 
-        subparsers = main_parser.add_subparsers(dest="loam_sub_name")
+        subparsers = typing.cast(
+            _internal.LazySubParsersAction,
+            main_parser.add_subparsers(
+                dest="loam_sub_name", action=_internal.LazySubParsersAction
+            ),
+        )
         for cmd_name, meta in self.subcmds.items():
-            dummy_parser = subparsers.add_parser(
-                cmd_name, prefix_chars="+-", help=meta.help
+            subparsers.add_lazy_parser(
+                cmd_name,
+                functools.partial(self._populate_subparser, cmd_name),
+                prefix_chars="+-",
+                help=meta.help,
             )
-            self._add_options_to_parser(self._opt_cmds[cmd_name], dummy_parser)
-            dummy_parser.set_defaults(**meta.defaults)
 
         return main_parser
 
+    def _populate_subparser(self, cmd_name: str, parser: ArgumentParser) -> None:
+        """Add options and defaults of a subcommand to its parser."""
+        self._add_options_to_parser(cmd_name, parser)
+        parser.set_defaults(**self.subcmds[cmd_name].defaults)
+
+    def _fast_flags_for(self, cmd_name: Optional[str]) -> Optional[_FastFlags]:
+        """Option strings of a command that can be parsed without argparse.
+
+        Each option string is mapped to the option name and the value it sets,
+        or `_NEEDS_VALUE` if the value is the next argument. This is None if
+        some option of the command requires argparse.
+
+        Args:
+            cmd_name: command name, set to None or '' for bare command.
+        """
+        cmd_name = cmd_name or None
+        if cmd_name not in self._fast_flags:
+            self._fast_flags[cmd_name] = self._build_fast_flags(cmd_name)
+        return self._fast_flags[cmd_name]
+
+    def _build_fast_flags(self, cmd_name: Optional[str]) -> Optional[_FastFlags]:
+        """Build option strings of a command, see `_fast_flags_for`."""
+        flags: _FastFlags = {}
+        for opt, sct in self._opts_for(cmd_name).items():
+            section: Section = getattr(self._conf, sct)
+            cli_kwargs = section.meta_(opt).entry.cli_kwargs
+            if not cli_kwargs.keys() <= _FAST_CLI_KWARGS:
+                return None
+            action = cli_kwargs.get("action", "store")
+            if action not in _FAST_ACTIONS and action is not _internal.Switch:
+                return None
+            for name in _names(section, opt):
+                if name in flags or name in ("-h", "--help"):
+                    # conflicting option strings, let argparse report them
+                    return None
+                if action is _internal.Switch:
+                    flags[name] = (opt, name[0] == "+")
+                else:
+                    flags[name] = (opt, _FAST_ACTIONS[action])
+        return flags
+
+    def _fast_parse_args(self, arglist: List[str]) -> Optional[Namespace]:
+        """Parse simple lists of arguments without argparse.
+
+        This only handles exact option strings (see `_fast_flags_for`), option
+        values that do not start with a prefix char, and a subcommand name.
+        This returns None for anything else (help, abbreviations, `--opt=val`
+        forms, errors...), argparse should be used in that case.
+        """
+        flags = self._fast_flags_for(None)
+        if flags is None:
+            return None
+        values: Dict[str, Any] = {"loam_sub_name": None}
+        values.update(self._defaults_for(None))
+        values.update(self.common.defaults)
+        if self.bare is not None:
+            values.update(self.bare.defaults)
+        sub_cmd: Optional[str] = None
+        parsed = values
+        args = iter(arglist)
+        for arg in args:
+            flag = flags.get(arg)
+            if flag is None:
+                if sub_cmd is not None or arg not in self._subcmds:
+                    return None
+                sub_cmd = arg
+                values["loam_sub_name"] = sub_cmd
+                flags = self._fast_flags_for(sub_cmd)
+                if flags is None:
+                    return None
+                # like argparse, parse subcommand options in their own namespace
+                parsed = dict(self._defaults_for(sub_cmd))
+                parsed.update(self._subcmds[sub_cmd].defaults)
+                continue
+            opt, value = flag
+            if value is _NEEDS_VALUE:
+                value = next(args, None)
+                if value is None or value.startswith(("-", "+")):
+                    return None
+            parsed[opt] = value
+        if parsed is not values:
+            values.update(parsed)
+        return argparse.Namespace(**values)
+
     def parse_args(self, arglist: Optional[List[str]] = None) -> Namespace:
         """Parse arguments and update options accordingly.
 
@@ -213,71 +397,69 @@ class CLIManager:
         Returns:
             the argument namespace returned by the `argparse.ArgumentParser`.
         """
-        args = self._parser.parse_args(args=arglist)
-        sub_cmd = args.loam_sub_name
-        if sub_cmd is None:
-            for opt, sct in self._opt_bare.items():
-                section: Section = getattr(self._conf, sct)
-                val = getattr(args, opt, None)
-                section.cast_and_set_(opt, val)
-        else:
-            for opt, sct in self._opt_cmds[sub_cmd].items():
-                section = getattr(self._conf, sct)
-                val = getattr(args, opt, None)
-                section.cast_and_set_(opt, val)
+        if arglist is None:
+            arglist = sys.argv[1:]
+        args = self._fast_parse_args(arglist)
+        if args is None:
+            args = self._parser.parse_args(args=arglist)
+        arg_values = vars(args)
+        options: Dict[str, Dict[str, Any]] = {}
+        for opt, sct in self._opts_for(args.loam_sub_name).items():
+            options.setdefault(sct, {})[opt] = arg_values.get(opt)
+        self._conf.update_from_dict_(options)
         return args
 
     def _zsh_comp_command(
-        self, zcf: TextIO, cmd: Optional[str], grouping: bool, add_help: bool = True
-    ) -> None:
-        """Write zsh _arguments compdef for a given command.
+        self, cmd: Optional[str], grouping: bool, add_help: bool = True
+    ) -> List[str]:
+        """Build zsh _arguments compdef lines for a given command.
 
         Args:
-            zcf: zsh compdef file.
             cmd: command name, set to None or '' for bare command.
             grouping: group options (zsh>=5.4).
             add_help: add an help option.
+
+        Returns:
+            list of compdef lines, without the line continuation.
         """
+        lines = []
         if add_help:
             if grouping:
-                print("+ '(help)'", end=BLK, file=zcf)
-            print("'--help[show help message]'", end=BLK, file=zcf)
-            print("'-h[show help message]'", end=BLK, file=zcf)
+                lines.append("+ '(help)'")
+            lines.append("'--help[show help message]'")
+            lines.append("'-h[show help message]'")
         # could deal with duplicate by iterating in reverse and keep set of
         # already defined opts.
         no_comp = ("store_true", "store_false")
-        cmd_dict = self._opt_cmds[cmd] if cmd else self._opt_bare
+        cmd_dict = self._opts_for(cmd)
         for opt, sct in cmd_dict.items():
             section: Section = getattr(self._conf, sct)
             entry = section.meta_(opt).entry
             comprule = entry.cli_zsh_comprule
-            if entry.cli_kwargs.get("action") == "append":
-                grpfmt, optfmt = "+ '{}'", "'*{}[{}]{}'"
+            cli_kwargs = entry.cli_kwargs
+            action = cli_kwargs.get("action")
+            if action == "append":
+                group, repeat = f"+ '{opt}'", "*"
                 if comprule is None:
                     comprule = ""
             else:
-                grpfmt, optfmt = "+ '({})'", "'{}[{}]{}'"
-            if (
-                entry.cli_kwargs.get("action") in no_comp
-                or entry.cli_kwargs.get("nargs") == 0
-            ):
+                group, repeat = f"+ '({opt})'", ""
+            if action in no_comp or cli_kwargs.get("nargs") == 0:
                 comprule = None
             if comprule is None:
-                compstr = ""
+                equal, compstr = "", ""
             elif comprule == "":
-                optfmt = optfmt.replace("[", "=[")
-                compstr = ": :( )"
+                equal, compstr = "=", ": :( )"
             else:
-                optfmt = optfmt.replace("[", "=[")
-                compstr = f": :{comprule}"
+                equal, compstr = "=", f": :{comprule}"
             if grouping:
-                print(grpfmt.format(opt), end=BLK, file=zcf)
-            for name in _names(section, opt):
-                print(
-                    optfmt.format(name, entry.doc.replace("'", "'\"'\"'"), compstr),
-                    end=BLK,
-                    file=zcf,
-                )
+                lines.append(group)
+            doc = entry.doc.replace("'", "'\"'\"'")
+            lines.extend(
+                f"'{repeat}{name}{equal}[{doc}]{compstr}'"
+                for name in _names(section, opt)
+            )
+        return lines
 
     def zsh_complete(
         self,
@@ -297,41 +479,40 @@ class CLIManager:
                 call to `compdef`, which means it can be sourced to activate
                 CLI completion.
             force_grouping: if True, assume zsh supports grouping of options.
-                Otherwise, loam will attempt to check whether zsh >= 5.4.
+                Otherwise, loam will attempt to check whether zsh >= 5.4. The
+                zsh version can be set with the `LOAM_ZSH_VERSION` environment
+                variable to skip running zsh.
         """
         grouping = force_grouping or _internal.zsh_version() >= (5, 4)
         path = pathlib.Path(path)
         firstline = ["#compdef", cmd]
         firstline.extend(cmds)
         subcmds = list(self.subcmds.keys())
-        with path.open("w") as zcf:
-            print(*firstline, end="\n\n", file=zcf)
-            # main function
-            print(f"function _{cmd} {{", file=zcf)
-            print("local line", file=zcf)
-            print("_arguments -C", end=BLK, file=zcf)
-            if subcmds:
-                # list of subcommands and their description
-                substrs = [rf"{sub}\:'{self.subcmds[sub].help}'" for sub in subcmds]
-                print(
-                    '"1:Commands:(({}))"'.format(" ".join(substrs)), end=BLK, file=zcf
-                )
-            self._zsh_comp_command(zcf, None, grouping)
-            if subcmds:
-                print("'*::arg:->args'", file=zcf)
-                print("case $line[1] in", file=zcf)
-                for sub in subcmds:
-                    print(f"{sub}) _{cmd}_{sub} ;;", file=zcf)
-                print("esac", file=zcf)
-            print("}", file=zcf)
-            # all subcommand completion handlers
-            for sub in subcmds:
-                print(f"\nfunction _{cmd}_{sub} {{", file=zcf)
-                print("_arguments", end=BLK, file=zcf)
-                self._zsh_comp_command(zcf, sub, grouping)
-                print("}", file=zcf)
-            if sourceable:
-                print(f"\ncompdef _{cmd} {cmd}", *cmds, file=zcf)
+        out = [" ".join(firstline), "\n\n"]
+        # main function
+        out.append(f"function _{cmd} {{\n")
+        out.append("local line\n")
+        out.append(f"_arguments -C{BLK}")
+        if subcmds:
+            # list of subcommands and their description
+            substrs = " ".join(rf"{sub}\:'{self.subcmds[sub].help}'" for sub in subcmds)
+            out.append(f'"1:Commands:(({substrs}))"{BLK}')
+        out.extend(line + BLK for line in self._zsh_comp_command(None, grouping))
+        if subcmds:
+            out.append("'*::arg:->args'\n")
+            out.append("case $line[1] in\n")
+            out.extend(f"{sub}) _{cmd}_{sub} ;;\n" for sub in subcmds)
+            out.append("esac\n")
+        out.append("}\n")
+        # all subcommand completion handlers
+        for sub in subcmds:
+            out.append(f"\nfunction _{cmd}_{sub} {{\n")
+            out.append(f"_arguments{BLK}")
+            out.extend(line + BLK for line in self._zsh_comp_command(sub, grouping))
+            out.append("}\n")
+        if sourceable:
+            out.append(" ".join([f"\ncompdef _{cmd} {cmd}", *cmds]) + "\n")
+        path.write_text("".join(out))
 
     def _bash_comp_command(
         self, cmd: Optional[str], add_help: bool = True
@@ -346,7 +527,7 @@ class CLIManager:
             list of CLI options strings.
         """
         out = ["-h", "--help"] if add_help else []
-        cmd_dict = self._opt_cmds[cmd] if cmd else self._opt_bare
+        cmd_dict = self._opts_for(cmd)
         for opt, sct in cmd_dict.items():
             section: Section = getattr(self._conf, sct)
             out.extend(_names(section, opt))
@@ -362,37 +543,36 @@ class CLIManager:
         """
         path = pathlib.Path(path)
         subcmds = list(self.subcmds.keys())
-        with path.open("w") as bcf:
-            # main function
-            print(f"_{cmd}() {{", file=bcf)
-            print("COMPREPLY=()", file=bcf)
-            print(r"local cur=${COMP_WORDS[COMP_CWORD]}", end="\n\n", file=bcf)
-            optstr = " ".join(self._bash_comp_command(None))
-            print(f'local options="{optstr}"', end="\n\n", file=bcf)
-            if subcmds:
-                print('local commands="{}"'.format(" ".join(subcmds)), file=bcf)
-                print("declare -A suboptions", file=bcf)
-            for sub in subcmds:
-                optstr = " ".join(self._bash_comp_command(sub))
-                print(f'suboptions[{sub}]="{optstr}"', file=bcf)
-            condstr = "if"
-            for sub in subcmds:
-                print(
-                    condstr, r'[[ "${COMP_LINE}" == *"', sub, '"* ]] ; then', file=bcf
-                )
-                print(
-                    r'COMPREPLY=( `compgen -W "${suboptions[',
-                    sub,
-                    r']}" -- ${cur}` )',
-                    sep="",
-                    file=bcf,
-                )
-                condstr = "elif"
-            print(condstr, r"[[ ${cur} == -* ]] ; then", file=bcf)
-            print(r'COMPREPLY=( `compgen -W "${options}" -- ${cur}`)', file=bcf)
-            if subcmds:
-                print(r"else", file=bcf)
-                print(r'COMPREPLY=( `compgen -W "${commands}" -- ${cur}`)', file=bcf)
-            print("fi", file=bcf)
-            print("}", end="\n\n", file=bcf)
-            print(f"complete -F _{cmd} {cmd}", *cmds, file=bcf)
+        optstr = " ".join(self._bash_comp_command(None))
+        header = [
+            f"_{cmd}() {{",
+            "COMPREPLY=()",
+            r"local cur=${COMP_WORDS[COMP_CWORD]}",
+            "",
+            f'local options="{optstr}"',
+            "",
+        ]
+        if subcmds:
+            header.append(f'local commands="{" ".join(subcmds)}"')
+            header.append("declare -A suboptions")
+        sub_opt_lines = [
+            f'suboptions[{sub}]="{" ".join(self._bash_comp_command(sub))}"'
+            for sub in subcmds
+        ]
+        cond_lines = []
+        for i, sub in enumerate(subcmds):
+            condstr = "elif" if i else "if"
+            cond_lines.append(f'{condstr} [[ "${{COMP_LINE}}" == *" {sub} "* ]] ; then')
+            cond_lines.append(
+                f'COMPREPLY=( `compgen -W "${{suboptions[{sub}]}}" -- ${{cur}}` )'
+            )
+        footer = [
+            ("elif" if subcmds else "if") + r" [[ ${cur} == -* ]] ; then",
+            r'COMPREPLY=( `compgen -W "${options}" -- ${cur}`)',
+        ]
+        if subcmds:
+            footer.append("else")
+            footer.append(r'COMPREPLY=( `compgen -W "${commands}" -- ${cur}`)')
+        footer.extend(["fi", "}", "", " ".join([f"complete -F _{cmd} {cmd}", *cmds])])
+        lines = [*header, *sub_opt_lines, *cond_lines, *footer]
+        path.write_text("\n".join(lines) + "\n")
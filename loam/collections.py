@@ -77,14 +77,18 @@ class TupleEntry(Generic[T]):
 
     def from_toml(self, obj: object) -> Tuple[T, ...]:
         """Build a tuple from a TOML object."""
+        inner_from_toml = self.inner_from_toml
         if isinstance(obj, str):
             sep = self.str_sep
             if sep is None:
                 raise TypeError("Cannot parse str into a Tuple as str_sep is None")
             sep = sep if sep != "" else None
-            obj = tuple(map(str.strip, obj.split(sep)))
+            if inner_from_toml is str:
+                # TYPE SAFETY: T is str, stripped substrings need no conversion
+                return tuple(map(str.strip, obj.split(sep)))  # type: ignore
+            return tuple(inner_from_toml(elt.strip()) for elt in obj.split(sep))
         if isinstance(obj, (list, tuple)):
-            return tuple(map(self.inner_from_toml, obj))
+            return tuple(map(inner_from_toml, obj))
         raise TypeError(f"obj should be a str, tuple, or list; got a {obj.__class__}")
 
     def to_toml(self, val: Tuple[T, ...]) -> Tuple[object, ...]:
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import copy
+import os
+import sys
+from dataclasses import dataclass, make_dataclass
 from pathlib import Path
 from typing import TYPE_CHECKING, Optional
 
 import pytest
 
+import loam.base
 from loam.base import ConfigBase, Section, entry
 
 if TYPE_CHECKING:
@@ -143,6 +147,16 @@ def test_to_file_exist_ok(my_config: MyConfig, cfile: Path) -> None:
     my_config.to_file_(cfile)
 
 
+def test_to_file_unchanged(my_config: MyConfig, cfile: Path) -> None:
+    my_config.to_file_(cfile)
+    os.utime(cfile, ns=(0, 0))
+    my_config.to_file_(cfile)
+    assert cfile.stat().st_mtime_ns == 0
+    my_config.section_a.some_n = 5
+    my_config.to_file_(cfile)
+    assert cfile.stat().st_mtime_ns != 0
+
+
 def test_config_with_not_section() -> None:
     @dataclass
     class MyConfig(ConfigBase):
@@ -160,3 +174,149 @@ def test_update_opt(conf: Conf) -> None:
 def test_update_section(conf: Conf) -> None:
     conf.update_from_dict_({"sectionA": {"optA": 42}, "sectionB": {"optA": 43}})
     assert conf.sectionA.optA == 42 and conf.sectionB.optA == 43
+
+
+def test_type_hints_cached_per_class() -> None:
+    @dataclass
+    class Parent(Section):
+        some_n: int = 42
+
+    @dataclass
+    class Child(Parent):
+        some_str: str = "foo"
+
+    assert set(Parent._type_hints()) == {"some_n"}
+    assert set(Child._type_hints()) == {"some_n", "some_str"}
+    assert Child._type_hints() is Child._type_hints()
+
+
+def test_meta_shared_between_instances() -> None:
+    @dataclass
+    class MySection(Section):
+        some_n: int = entry(val=42, doc="some int")
+
+    sec_a, sec_b = MySection(), MySection(5)
+    assert sec_a.meta_("some_n") is sec_b.meta_("some_n")
+    assert sec_a.meta_("some_n").entry.doc == "some int"
+
+
+def test_meta_copy(section_a: SectionA) -> None:
+    meta = section_a.meta_("some_n")
+    assert copy.copy(meta) == meta
+
+
+def test_update_from_modified_file(my_config: MyConfig, cfile: Path) -> None:
+    cfile.write_text("[section_a]\nsome_n=5\n")
+    my_config.update_from_file_(cfile)
+    assert my_config.section_a.some_n == 5
+    cfile.write_text("[section_a]\nsome_n=12\n")
+    my_config.update_from_file_(cfile)
+    assert my_config.section_a.some_n == 12
+
+
+def test_update_from_replaced_file(my_config: MyConfig, cfile: Path) -> None:
+    cfile.write_text("[section_a]\nsome_n=1\n")
+    my_config.update_from_file_(cfile)
+    stat = cfile.stat()
+    cfile.write_text("[section_a]\nsome_n=2\n")
+    os.utime(cfile, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    my_config.update_from_file_(cfile)
+    assert my_config.section_a.some_n == 2
+
+
+def test_update_from_relative_path(
+    my_config: MyConfig, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    for value, dirname in enumerate(("a", "b"), 1):
+        (tmp_path / dirname).mkdir()
+        cfile = tmp_path / dirname / "c.toml"
+        cfile.write_text(f"[section_a]\nsome_n={value}\n")
+        os.utime(cfile, ns=(0, 0))
+    monkeypatch.chdir(tmp_path / "a")
+    my_config.update_from_file_("c.toml")
+    assert my_config.section_a.some_n == 1
+    monkeypatch.chdir(tmp_path / "b")
+    my_config.update_from_file_("c.toml")
+    assert my_config.section_a.some_n == 2
+
+
+@dataclass
+class ListSection(Section):
+    lst: list = entry(val_factory=list)
+
+
+@dataclass
+class ListConf(ConfigBase):
+    sec: ListSection
+
+
+def test_type_hints_missing_annotations(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(loam.base, "_own_annotations", lambda _: {})
+
+    @dataclass
+    class MySection(Section):
+        some_n: int = 42
+
+    assert MySection._type_hints() == {"some_n": int}
+
+
+if sys.version_info >= (3, 10):
+
+    @dataclass(slots=True)
+    class SlotSection(Section):
+        some_n: int = 42
+
+    @dataclass
+    class SlotConf(ConfigBase):
+        sec: SlotSection
+
+
+needs_slots = pytest.mark.skipif(
+    sys.version_info < (3, 10), reason="dataclass slots require python 3.10"
+)
+
+
+@needs_slots
+def test_to_file_slotted_section(cfile: Path) -> None:
+    conf = SlotConf.default_()
+    conf.sec.some_n = 5
+    conf.to_file_(cfile)
+    new_conf = SlotConf.default_()
+    new_conf.update_from_file_(cfile)
+    assert new_conf.sec.some_n == 5
+
+
+@needs_slots
+def test_context_slotted_section() -> None:
+    sec = SlotSection()
+    with sec.context_(some_n=3):
+        assert sec.some_n == 3
+    assert sec.some_n == 42
+
+
+def test_to_file_single_entry(cfile: Path) -> None:
+    conf = ListConf.default_()
+    conf.sec.lst = [3, 4]
+    conf.to_file_(cfile)
+    new_conf = ListConf.default_()
+    new_conf.update_from_file_(cfile)
+    assert new_conf.sec.lst == [3, 4]
+
+
+def test_update_from_file_not_shared(cfile: Path) -> None:
+    cfile.write_text("[sec]\nlst=[1, 2]\n")
+    conf = ListConf.default_()
+    conf.update_from_file_(cfile)
+    conf.sec.lst.append(99)
+    other = ListConf.default_()
+    other.update_from_file_(cfile)
+    assert other.sec.lst == [1, 2]
+    assert conf.sec.lst is not other.sec.lst
+
+
+def test_type_hints_not_postponed() -> None:
+    MySection = make_dataclass(
+        "MySection", [("some_n", int, entry(val=42))], bases=(Section,)
+    )
+    assert MySection._type_hints() == {"some_n": int}  # type: ignore
+    assert MySection("5").some_n == 5  # type: ignore
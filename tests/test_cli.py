@@ -75,3 +75,50 @@ def test_parse_not_conf_cmd_args(climan: CLIManager) -> None:
 def test_build_climan_invalid_sub(conf: Conf) -> None:
     with pytest.raises(loam.error.SubcmdError):
         loam.cli.CLIManager(conf, **{"1invalid_sub": loam.cli.Subcmd("")})
+
+
+def test_build_climan_invalid_section(conf: Conf) -> None:
+    with pytest.raises(AttributeError):
+        loam.cli.CLIManager(conf, sub=loam.cli.Subcmd("", "sectionA", "typo"))
+
+
+@pytest.mark.parametrize("args", ["sub", "--optA=3 sub"])
+def test_shadowed_option_warning(conf: Conf, args: str) -> None:
+    climan = loam.cli.CLIManager(
+        conf,
+        bare_=loam.cli.Subcmd("", "sectionA"),
+        sub=loam.cli.Subcmd("", "sectionA", "sectionB"),
+    )
+    with pytest.warns(loam.error.LoamWarning) as record:
+        climan.parse_args(split(args))
+    assert all(warn.filename == __file__ for warn in record)
+
+
+def test_parse_sub_twice(conf: Conf, climan: CLIManager) -> None:
+    climan.parse_args(split("sectionB --optA 42"))
+    climan.parse_args(split("sectionB --optB 43"))
+    assert conf.sectionB.optA == 4
+    assert conf.sectionB.optB == 43
+
+
+def test_parse_sub_defaults_at_creation(conf: Conf, climan: CLIManager) -> None:
+    conf.sectionB.optA = 20
+    climan.parse_args(split("sectionB"))
+    assert conf.sectionB.optA == 4
+    conf.sectionB.optA = 20
+    climan.parse_args(split("sectionB --optB=3"))
+    assert conf.sectionB.optA == 4
+
+
+def test_parse_simple_args_without_argparse(conf: Conf, climan: CLIManager) -> None:
+    climan.parse_args(split("--optA 42 +o sectionB -o --optB 43"))
+    assert "_parser" not in vars(climan)
+    assert conf.sectionA.optA == 1
+    assert conf.sectionB.optB == 43
+    assert conf.sectionB.optBool is False
+
+
+def test_parse_fallback_to_argparse(conf: Conf, climan: CLIManager) -> None:
+    climan.parse_args(split("--optA=42 --optC -3"))
+    assert conf.sectionA.optA == 42
+    assert conf.sectionA.optC == -3
@@ -64,6 +64,12 @@ def test_tuple_entry_whitespace() -> None:
     assert tpl.from_toml("5  6 7\t1\n  42") == (5, 6, 7, 1, 42)
 
 
+def test_tuple_entry_str() -> None:
+    tpl = TupleEntry(inner_from_toml=str)
+    assert tpl.from_toml("a, b,c ") == ("a", "b", "c")
+    assert tpl.from_toml(["a", "b"]) == ("a", "b")
+
+
 def test_tuple_entry_from_arr_str(tpl: TupleEntry[int]) -> None:
     assert tpl.from_toml(["5", "3", "42"]) == (5, 3, 42)
 
@@ -2,6 +2,10 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
+import pytest
+
+from loam._internal import zsh_version
+
 if TYPE_CHECKING:
     from pathlib import Path
 
@@ -86,3 +90,24 @@ def test_zsh_complete_file(climan: CLIManager, tmp_path: Path) -> None:
     climan.zsh_complete(script_zsh, "cmd", force_grouping=True)
     produced_zsh = script_zsh.read_text()
     assert produced_zsh == EXPECTED_ZSH
+
+
+def test_zsh_version_cached(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("LOAM_ZSH_VERSION", "5.8")
+    zsh_version.cache_clear()
+    try:
+        assert zsh_version() == (5, 8)
+        monkeypatch.setenv("LOAM_ZSH_VERSION", "4.2")
+        assert zsh_version() == (5, 8)
+        assert zsh_version.cache_info().hits == 1
+    finally:
+        zsh_version.cache_clear()
+
+
+def test_zsh_version_from_env(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("LOAM_ZSH_VERSION", "5.8.1")
+    zsh_version.cache_clear()
+    try:
+        assert zsh_version() == (5, 8)
+    finally:
+        zsh_version.cache_clear()